@@ -1,4 +1,5 @@
 import streamlit as st
+from session import session_lock
 
 class QuiddlerCalculator:
     """Class to handle calculator functionality for Quiddler scoresheet."""
@@ -20,7 +21,9 @@ class QuiddlerCalculator:
         except Exception as err:
             result_value = f"Error: {err}"
         
-        st.session_state.calc_output = result_value
+        # Callbacks run before begin_run, so guard against a concurrent spill
+        with session_lock():
+            st.session_state.calc_output = result_value
         st.session_state.calc_input = ""  # clear the input for the next entry
     
     def render_calculator_input(self):
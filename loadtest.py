@@ -0,0 +1,390 @@
+# loadtest.py
+"""Offline load generator for the Quiddler score sheet.
+
+Starts the Streamlit app locally and drives many simulated tables over the
+same websocket protocol the browser uses. Each table changes the settings,
+names its players, enters scores round by round and uses the calculator.
+The report covers rerun throughput, latency percentiles and server RSS for
+each table count.
+
+    python loadtest.py --tables 1,10,25,50 --players 4 --rounds 10
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from tornado.websocket import websocket_connect
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_SCRIPT = os.path.join(APP_DIR, "quiddler.py")
+
+
+def find_free_port():
+    """Ask the OS for an unused local TCP port."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def read_rss_bytes(pid):
+    """Resident set size of a process, read from /proc (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class AppServer:
+    """A headless Streamlit server process running the score sheet."""
+
+    def __init__(self, spill_dir):
+        self.port = find_free_port()
+        self.spill_dir = spill_dir
+        self.process = None
+
+    @property
+    def url(self):
+        return f"ws://127.0.0.1:{self.port}/_stcore/stream"
+
+    def start(self, timeout=60):
+        """Launch the server and wait until its health check passes."""
+        env = dict(os.environ, QUIDDLER_SPILL_DIR=self.spill_dir)
+        self.process = subprocess.Popen(
+            [
+                sys.executable, "-m", "streamlit", "run", APP_SCRIPT,
+                "--server.headless", "true",
+                "--server.address", "127.0.0.1",
+                "--server.port", str(self.port),
+                "--server.fileWatcherType", "none",
+                "--server.enableXsrfProtection", "false",
+                "--server.enableCORS", "false",
+                "--browser.gatherUsageStats", "false",
+            ],
+            cwd=APP_DIR,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+        health_url = f"http://127.0.0.1:{self.port}/_stcore/health"
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError("Streamlit server exited during startup")
+            try:
+                with urllib.request.urlopen(health_url, timeout=1) as response:
+                    if response.status == 200:
+                        return
+            except OSError:
+                time.sleep(0.2)
+        self.stop()
+        raise RuntimeError(f"Streamlit server did not become healthy within {timeout}s")
+
+    def rss_bytes(self):
+        return read_rss_bytes(self.process.pid) if self.process else 0
+
+    def stop(self):
+        """Terminate the server process."""
+        if self.process is None:
+            return
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.process = None
+
+
+class SimulatedTable:
+    """One scorekeeping session driven over the Streamlit websocket."""
+
+    def __init__(self, table_id, url, players, rounds, entry_mode, think_time):
+        self.table_id = table_id
+        self.url = url
+        self.players = players
+        self.rounds = rounds
+        self.entry_mode = entry_mode
+        self.think_time = think_time
+
+        self.connection = None
+        self.query_string = ""
+        self.widget_ids = {}
+        self.rendered_ids = {}
+        self.widget_states = {}
+        self.grid_edits = {}
+        self.entered = {}
+        self.rendered_totals = {}
+        self.totals = {}
+        self.latencies = []
+        self.errors = 0
+        self.mismatched = False
+
+    @staticmethod
+    def _widget_name(widget):
+        """User key of a widget, falling back to its label when it has none."""
+        # Keyed widget ids end in "-<key>"; unkeyed ones end in "-None"
+        key = widget.id.split("-", 2)[-1]
+        return getattr(widget, "label", "") if key == "None" else key
+
+    def _handle_forward_msg(self, msg):
+        """Track widget ids and the query string; return True when a run ends."""
+        kind = msg.WhichOneof("type")
+        if kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+            element = msg.delta.new_element
+            element_type = element.WhichOneof("type")
+            if element_type == "exception":
+                self.errors += 1
+            elif element_type == "metric":
+                self.rendered_totals[element.metric.label] = element.metric.body
+            elif element_type:
+                widget = getattr(element, element_type)
+                if getattr(widget, "id", ""):
+                    self.rendered_ids[self._widget_name(widget)] = widget.id
+        elif kind == "page_info_changed":
+            self.query_string = msg.page_info_changed.query_string
+        elif kind == "script_finished":
+            if msg.script_finished == ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                return False
+            self._sync_rendered_widgets()
+            return True
+        return False
+
+    def _sync_rendered_widgets(self):
+        """Forget widgets the last run did not render, as the browser would."""
+        self.totals = self.rendered_totals
+        self.rendered_totals = {}
+        if self.rendered_ids:
+            self.widget_ids = self.rendered_ids
+            live_ids = set(self.widget_ids.values())
+            self.widget_states = {
+                wid: state for wid, state in self.widget_states.items() if wid in live_ids
+            }
+        self.rendered_ids = {}
+
+    def _widget_id(self, name):
+        """Look up a widget id by key or label, matching key prefixes too."""
+        if name in self.widget_ids:
+            return self.widget_ids[name]
+        for widget_name, widget_id in self.widget_ids.items():
+            if widget_name.startswith(name):
+                return widget_id
+        raise KeyError(f"table {self.table_id}: widget {name!r} not rendered")
+
+    def _set(self, name, field, value):
+        """Stage a widget value to be sent with the next rerun."""
+        state = WidgetState(id=self._widget_id(name))
+        setattr(state, field, value)
+        self.widget_states[state.id] = state
+
+    async def rerun(self, trigger=None):
+        """Send a rerun with the current widget states and time it to completion."""
+        states = list(self.widget_states.values())
+        if trigger is not None:
+            states.append(WidgetState(id=self._widget_id(trigger), trigger_value=True))
+
+        msg = BackMsg()
+        msg.rerun_script.query_string = self.query_string
+        msg.rerun_script.widget_states.widgets.extend(states)
+
+        started = time.perf_counter()
+        await self.connection.write_message(msg.SerializeToString(), binary=True)
+        while True:
+            data = await self.connection.read_message()
+            if data is None:
+                raise ConnectionError(f"table {self.table_id}: server closed the connection")
+            if isinstance(data, bytes) and self._handle_forward_msg(ForwardMsg.FromString(data)):
+                break
+        self.latencies.append(time.perf_counter() - started)
+
+        if self.think_time:
+            await asyncio.sleep(self.think_time)
+
+    async def _enter_score(self, player, round_num, score):
+        self.entered[(player, round_num)] = score
+        if self.entry_mode == "grid":
+            self.grid_edits.setdefault(str(round_num - 1), {})[player] = score
+            edits = {"edited_rows": self.grid_edits, "added_rows": [], "deleted_rows": []}
+            self._set("score_grid_", "string_value", json.dumps(edits))
+        else:
+            self._set(f"score_{player}_{round_num}", "int_value", score)
+        await self.rerun()
+
+    async def _use_calculator(self, round_num):
+        self._set("calc_input", "string_value", f"{round_num} * 3 + 12 / 4")
+        await self.rerun(trigger="Calculate")
+        self._set("calc_input", "string_value", "")
+
+    async def play(self):
+        """Play one full game: settings, names, then every round with the calculator."""
+        self.connection = await websocket_connect(self.url, subprotocols=["streamlit"])
+        try:
+            await self.rerun()
+
+            self._set("num_players_input", "int_value", self.players)
+            self._set("num_games_input", "int_value", self.rounds)
+            await self.rerun()
+
+            names = [f"T{self.table_id}P{i + 1}" for i in range(self.players)]
+            for i, name in enumerate(names):
+                self._set(f"player_name_{i}", "string_value", name)
+                await self.rerun()
+
+            if self.entry_mode == "grid":
+                self._set("entry_mode", "int_value", 1)
+                await self.rerun()
+
+            for round_num in range(1, self.rounds + 1):
+                await self._use_calculator(round_num)
+                for i, name in enumerate(names):
+                    await self._enter_score(name, round_num, 5 + (self.table_id + i + round_num) % 40)
+
+            self.check_totals(names)
+        finally:
+            self.connection.close()
+
+    def check_totals(self, names):
+        """Compare the totals the app rendered last with the scores entered."""
+        for name in names:
+            expected = sum(score for (player, _), score in self.entered.items() if player == name)
+            if self.totals.get(name) != str(expected):
+                self.mismatched = True
+                print(f"  ! table {self.table_id}: {name} shows {self.totals.get(name)}, "
+                      f"expected {expected}", file=sys.stderr)
+
+
+async def run_step(servers, tables, args):
+    """Drive a number of concurrent tables and sample server RSS while they play."""
+    sims = [
+        SimulatedTable(t, servers[t % len(servers)].url, args.players, args.rounds,
+                       args.entry_mode, args.think_time)
+        for t in range(tables)
+    ]
+
+    peak_rss = 0
+    done = asyncio.Event()
+
+    async def sample_rss():
+        nonlocal peak_rss
+        while not done.is_set():
+            peak_rss = max(peak_rss, sum(s.rss_bytes() for s in servers))
+            await asyncio.sleep(0.25)
+
+    sampler = asyncio.create_task(sample_rss())
+    started = time.perf_counter()
+    results = await asyncio.gather(*(sim.play() for sim in sims), return_exceptions=True)
+    elapsed = time.perf_counter() - started
+    done.set()
+    await sampler
+
+    latencies = [lat for sim in sims for lat in sim.latencies]
+    failed = [r for r in results if isinstance(r, Exception)]
+    for failure in failed[:3]:
+        print(f"  ! {failure}", file=sys.stderr)
+
+    return {
+        "tables": tables,
+        "servers": len(servers),
+        "reruns": len(latencies),
+        "failed_tables": len(failed),
+        "mismatched_tables": sum(sim.mismatched for sim in sims),
+        "app_errors": sum(sim.errors for sim in sims),
+        "seconds": round(elapsed, 3),
+        "reruns_per_s": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "peak_rss_mib": round(peak_rss / 2**20, 1),
+        "end_rss_mib": round(sum(s.rss_bytes() for s in servers) / 2**20, 1),
+    }
+
+
+def print_report(rows):
+    """Print results as an aligned text table."""
+    columns = ["tables", "servers", "reruns", "failed_tables", "mismatched_tables", "app_errors",
+               "seconds", "reruns_per_s", "p50_ms", "p95_ms", "p99_ms", "peak_rss_mib",
+               "end_rss_mib"]
+    widths = [max(len(c), *(len(str(r[c])) for r in rows)) for c in columns]
+    print("  ".join(c.rjust(w) for c, w in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(str(row[c]).rjust(w) for c, w in zip(columns, widths)))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the Quiddler score sheet locally.")
+    parser.add_argument("--tables", default="1,5,10,25",
+                        help="comma-separated concurrent table counts to sweep (default: 1,5,10,25)")
+    parser.add_argument("--servers", type=int, default=1,
+                        help="Streamlit processes to spread tables across (default: 1)")
+    parser.add_argument("--players", type=int, default=4, help="players per table, 2-8 (default: 4)")
+    parser.add_argument("--rounds", type=int, default=10, help="rounds per table, 1-10 (default: 10)")
+    parser.add_argument("--entry-mode", choices=["fields", "grid"], default="fields",
+                        help="score entry mode each table uses (default: fields)")
+    parser.add_argument("--think-time", type=float, default=0.0,
+                        help="seconds each table pauses between edits (default: 0)")
+    parser.add_argument("--json", metavar="PATH", help="also write the results to a JSON file")
+    args = parser.parse_args(argv)
+
+    if not 2 <= args.players <= 8:
+        parser.error("--players must be between 2 and 8")
+    if not 1 <= args.rounds <= 10:
+        parser.error("--rounds must be between 1 and 10")
+    if args.servers < 1:
+        parser.error("--servers must be at least 1")
+    try:
+        args.tables = [int(n) for n in args.tables.split(",")]
+    except ValueError:
+        parser.error("--tables must be a comma-separated list of integers")
+    return args
+
+
+def main(argv=None):
+    """Run the load-test sweep, starting fresh servers for each table count."""
+    args = parse_args(argv)
+    rows = []
+
+    for tables in args.tables:
+        with tempfile.TemporaryDirectory(prefix="quiddler-loadtest-") as spill_dir:
+            servers = [AppServer(spill_dir) for _ in range(args.servers)]
+            try:
+                for server in servers:
+                    server.start()
+                print(f"Running {tables} table(s) on {len(servers)} server(s)...", file=sys.stderr)
+                rows.append(asyncio.run(run_step(servers, tables, args)))
+            finally:
+                for server in servers:
+                    server.stop()
+
+    print_report(rows)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
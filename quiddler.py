@@ -4,6 +4,7 @@ import streamlit as st
 from expander import QuiddlerExpanders
 from calculator import QuiddlerCalculator
 from scoresheet import QuiddlerScoresheet
+from session import QuiddlerSessionManager
 
 def main():
     """Main application function."""
@@ -16,6 +17,11 @@ def main():
         initial_sidebar_state="collapsed"
     )
 
+    # ── 1b) Session Lifecycle ──────────────────────────────────────────────────
+    # Rehydrate a spilled game before any component reads session state
+    session_manager = QuiddlerSessionManager()
+    session_manager.begin_run()
+
     # ── 2) Banner (if desired) ─────────────────────────────────────────────────
     if "first_time" not in st.session_state:
         welcome_banner = """
@@ -71,6 +77,9 @@ def main():
         unsafe_allow_html=True,
     )
 
+    # ── 9) Spill Idle Sessions ──────────────────────────────────────────────────
+    session_manager.end_run()
+
 
 if __name__ == "__main__":
     main()
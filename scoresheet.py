@@ -1,6 +1,9 @@
+import uuid
+
 import streamlit as st
 import pandas as pd
 import numpy as np
+from session import session_lock
 
 class QuiddlerScoresheet:
     """Interactive score sheet for Quiddler card game using Streamlit."""
@@ -14,7 +17,8 @@ class QuiddlerScoresheet:
             "num_players": 2,
             "num_games": 5,
             "settings_changed": False,
-            "df_scores": None
+            "df_scores": None,
+            "entry_mode": "Fields"
         }
         
         for key, value in defaults.items():
@@ -156,6 +160,14 @@ class QuiddlerScoresheet:
             st.session_state.num_games = new_games
             st.session_state.settings_changed = True
 
+        st.radio(
+            "Score entry",
+            options=["Fields", "Grid"],
+            horizontal=True,
+            help="Grid edits the whole score sheet as a single table",
+            key="entry_mode"
+        )
+
     def render_player_names(self):
         """Render player name input fields."""
         st.markdown("### Player Names")
@@ -174,17 +186,90 @@ class QuiddlerScoresheet:
                 # Note: We don't need to manually track name changes here
                 # The _needs_dataframe_rebuild() method will detect column changes
 
+    @staticmethod
+    def _clean_score(value):
+        """Clamp an entered score to 0-999, treating blank or 0 as not entered."""
+        if value is None or pd.isna(value):
+            return None
+        score = min(max(int(value), 0), 999)
+        return score if score > 0 else None
+
+    def _grid_signature(self):
+        """Structure the score grid was built for (player names and rounds)."""
+        return (tuple(self._get_player_names()), st.session_state.num_games)
+
+    def _rebuild_score_grid(self):
+        """Build a fresh base frame for the grid from the scores dict."""
+        self._update_dataframe_from_scores()
+        base = st.session_state["df_scores"].set_index("Round")
+        st.session_state.score_grid_base = base.apply(pd.to_numeric).astype("Int64")
+        st.session_state.score_grid_signature = self._grid_signature()
+        # A new key gives a new widget, so no stale edit diff carries over
+        st.session_state.score_grid_key = f"score_grid_{uuid.uuid4().hex[:8]}"
+
+    def _apply_grid_edits(self, grid_key):
+        """Apply the grid's edit diff to the scores dict in a single pass."""
+        edits = st.session_state.get(grid_key, {}).get("edited_rows", {})
+        
+        # Callbacks run before begin_run, so guard against a concurrent spill
+        with session_lock():
+            scores = st.session_state.setdefault("scores", {})
+            
+            # edited_rows accumulates against the base frame, so re-applying it
+            # is safe. Grid rows are rounds 1..N in order.
+            for row, changes in edits.items():
+                round_num = int(row) + 1
+                for player, value in changes.items():
+                    scores[f"score_{player}_{round_num}"] = self._clean_score(value)
+
+    def render_score_grid(self):
+        """Render the score table as a single editable grid."""
+        if (
+            "score_grid_base" not in st.session_state
+            or st.session_state.get("score_grid_signature") != self._grid_signature()
+        ):
+            self._rebuild_score_grid()
+        
+        grid_key = st.session_state.score_grid_key
+        st.data_editor(
+            st.session_state.score_grid_base,
+            column_config={
+                player: st.column_config.NumberColumn(
+                    player,
+                    min_value=0,
+                    max_value=999,
+                    step=1,
+                    format="%d"
+                )
+                for player in self._get_player_names()
+            },
+            num_rows="fixed",
+            use_container_width=True,
+            key=grid_key,
+            on_change=self._apply_grid_edits,
+            args=(grid_key,)
+        )
+        
+        self._update_dataframe_from_scores()
+
     def render_score_editor(self):
         """Render the interactive score table using individual input fields."""
         st.markdown("### Score Entry")
         
-        # Get player names
-        player_names = self._get_player_names()
-        
         # Initialize scores in session state if not exists
         if "scores" not in st.session_state:
             st.session_state.scores = {}
         
+        if st.session_state.entry_mode == "Grid":
+            self.render_score_grid()
+            return
+        
+        # Scores may change here, so the grid rebuilds from them next time
+        st.session_state.pop("score_grid_base", None)
+        
+        # Get player names
+        player_names = self._get_player_names()
+        
         # Create a table-like layout
         # Header row
         header_cols = st.columns([1] + [2] * len(player_names))
@@ -0,0 +1,421 @@
+import copy
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import nullcontext
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Lifecycle settings, overridable through the environment for event days.
+IDLE_TIMEOUT_SECONDS = float(os.environ.get("QUIDDLER_IDLE_TIMEOUT", 15 * 60))
+# Budget on the estimated bytes of session state objects (scores, DataFrames,
+# widget values), not on process RSS. A full 8x10 game is roughly 12 KB.
+STATE_BUDGET_BYTES = int(os.environ.get("QUIDDLER_STATE_BUDGET", 2 * 1024 * 1024))
+SPILL_DIR = os.environ.get("QUIDDLER_SPILL_DIR", ".quiddler_sessions")
+SPILL_TTL_SECONDS = float(os.environ.get("QUIDDLER_SPILL_TTL", 24 * 60 * 60))
+
+# A run that never reached end_run (e.g. it raised) stops counting as running
+# after this long, so its session can still be spilled.
+RUN_TIMEOUT_SECONDS = 5 * 60
+
+# How often end_run sweeps SPILL_DIR for snapshots older than the TTL.
+SWEEP_INTERVAL_SECONDS = 60
+
+# Only these keys are written to the store; everything else (df_scores, widget
+# keys) is rebuilt by the components on the next run.
+PERSISTED_KEYS = (
+    "first_time", "num_players", "num_games", "entry_mode", "scores", "calc_output"
+)
+PERSISTED_PREFIXES = ("player_name_",)
+
+# Keys dropped from memory on spill. Widget values and the grid's base frame
+# stay resident: the browser re-sends widget values with every rerun, and the
+# grid's pending edit diff is only meaningful against the same base frame.
+SPILLED_KEYS = ("df_scores", "scores", "calc_output")
+
+GAME_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+
+def estimate_size(value, _seen=None):
+    """Estimate the memory held by a session state value, in bytes."""
+    if _seen is None:
+        _seen = set()
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(value.memory_usage(deep=True).sum())
+
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(k, _seen) + estimate_size(v, _seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(v, _seen) for v in value)
+    return size
+
+
+class _SessionRecord:
+    """Bookkeeping for one browser session known to this process."""
+
+    def __init__(self, session_state, game_id):
+        # Streamlit wraps the session's state afresh for every run; the latest
+        # wrapper is kept and dropped with the record once the session closes.
+        self.session_state = session_state
+        self.game_id = game_id
+        self.last_seen = time.monotonic()
+        self.footprint = 0
+        self.running = False
+        self.spilling = False
+        self.spilled = False
+        # Set once a new session has taken this game over; a spill in flight
+        # must then leave the store alone.
+        self.retired = False
+        # Held by callbacks and by spills, since each run's wrapper has its own
+        # lock and callbacks run before begin_run marks the session running.
+        self.lock = threading.RLock()
+
+
+class SessionRegistry:
+    """Process-wide registry of sessions, ordered from coldest to hottest."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.records = OrderedDict()
+        # Games whose stored snapshot is newer than any state in memory. Kept
+        # here so the flag survives the session's record being pruned.
+        self.spilled_games = set()
+        self.last_sweep = 0.0
+
+    def resident_bytes(self):
+        """Total estimated state bytes of all sessions still held in memory."""
+        return sum(r.footprint for r in self.records.values())
+
+    def owner_of(self, game_id, exclude=None):
+        """Session id and record holding a game, other than `exclude`."""
+        for session_id, record in self.records.items():
+            if record.game_id == game_id and session_id != exclude:
+                return session_id, record
+        return None, None
+
+
+@st.cache_resource
+def get_session_registry():
+    """Return the registry shared by every session in this process."""
+    return SessionRegistry()
+
+
+def session_lock():
+    """Lock guarding the current session's game state against a spill.
+
+    Widget callbacks that write spilled keys must hold it, because they run
+    before the script reaches begin_run.
+    """
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return nullcontext()
+    registry = get_session_registry()
+    with registry.lock:
+        record = registry.records.get(ctx.session_id)
+    return record.lock if record is not None else nullcontext()
+
+
+class QuiddlerSessionManager:
+    """Class to keep per-session game state within a process state budget."""
+
+    def __init__(self, idle_timeout=IDLE_TIMEOUT_SECONDS, state_budget=STATE_BUDGET_BYTES,
+                 spill_dir=SPILL_DIR, spill_ttl=SPILL_TTL_SECONDS):
+        self.idle_timeout = idle_timeout
+        self.state_budget = state_budget
+        self.spill_dir = spill_dir
+        self.spill_ttl = spill_ttl
+        self.registry = get_session_registry()
+
+        ctx = get_script_run_ctx()
+        self.session_id = ctx.session_id if ctx else None
+        self._session_state = ctx.session_state if ctx else None
+
+    def _get_game_id(self):
+        """Get the game id from the URL, assigning one if missing or malformed."""
+        game_id = st.query_params.get("game", "")
+        if not GAME_ID_PATTERN.fullmatch(game_id):
+            game_id = self._new_game_id()
+        return game_id
+
+    @staticmethod
+    def _new_game_id():
+        """Assign this session a fresh game id and put it in the URL."""
+        game_id = uuid.uuid4().hex
+        st.query_params["game"] = game_id
+        return game_id
+
+    @staticmethod
+    def _is_connected(session_id):
+        """Check whether a session still has a browser connected."""
+        return not Runtime.exists() or Runtime.instance().is_active_session(session_id)
+
+    def _spill_path(self, game_id):
+        """Path of the stored snapshot for a game."""
+        return os.path.join(self.spill_dir, f"{game_id}.json")
+
+    @staticmethod
+    def _is_persisted(key):
+        """Check whether a session state key belongs in the stored snapshot."""
+        return key in PERSISTED_KEYS or key.startswith(PERSISTED_PREFIXES)
+
+    def measure_footprint(self):
+        """Estimate the bytes of this session's state objects."""
+        if self._session_state is None:
+            return 0
+        return estimate_size(self._session_state.filtered_state)
+
+    def _persisted_state(self, state):
+        """Deep copy of the keys of a session's state that belong in the store."""
+        return copy.deepcopy(
+            {key: value for key, value in state.filtered_state.items() if self._is_persisted(key)}
+        )
+
+    def _spill(self, record):
+        """Write an idle session's game to the store and drop it from memory."""
+        state = record.session_state
+        with record.lock:
+            snapshot = self._persisted_state(state)
+
+        path = self._spill_path(record.game_id)
+        tmp_path = f"{path}.tmp"
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, default=str)
+            os.replace(tmp_path, path)
+        except OSError:
+            # Keep the game resident rather than lose it
+            record.spilling = False
+            return
+
+        with record.lock:
+            resident = state.filtered_state
+            # The session woke up or a callback changed the game while the
+            # snapshot was written; keep it resident and discard the snapshot.
+            changed = any(
+                self._is_persisted(key) and resident.get(key) != snapshot.get(key)
+                for key in SPILLED_KEYS
+            )
+            if record.running or record.retired or changed:
+                self._remove_spill_file(path)
+            else:
+                for key in SPILLED_KEYS:
+                    if key in resident:
+                        del state[key]
+                record.spilled = True
+                record.footprint = estimate_size(state.filtered_state)
+                with self.registry.lock:
+                    self.registry.spilled_games.add(record.game_id)
+            record.spilling = False
+
+    @staticmethod
+    def _remove_spill_file(path):
+        """Delete a stored snapshot, ignoring one that is already gone."""
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _rehydrate(self, game_id):
+        """Restore a spilled game into this session's state."""
+        with self.registry.lock:
+            _, owner = self.registry.owner_of(game_id, exclude=self.session_id)
+        if owner is not None:
+            # The snapshot belongs to another live session
+            return False
+
+        path = self._spill_path(game_id)
+        try:
+            with open(path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        self._restore(snapshot)
+        self._remove_spill_file(path)
+        with self.registry.lock:
+            self.registry.spilled_games.discard(game_id)
+        return True
+
+    def _restore(self, snapshot):
+        """Merge a game snapshot into this session's state."""
+        for key, value in snapshot.items():
+            if not self._is_persisted(key):
+                continue
+            if key not in st.session_state:
+                st.session_state[key] = value
+            elif isinstance(value, dict) and isinstance(st.session_state[key], dict):
+                # Callbacks that ran since the spill hold newer entries
+                st.session_state[key] = {**value, **st.session_state[key]}
+
+    def _register_session(self):
+        """Create this session's record; call with the registry lock held.
+
+        Returns the record and, if this session takes over the game of a
+        disconnected session, that session's record.
+        """
+        game_id = self._get_game_id()
+        owner_id, owner = self.registry.owner_of(game_id)
+        if owner is not None and self._is_connected(owner_id):
+            # A duplicated tab or shared link: start a separate game
+            game_id = self._new_game_id()
+            owner = None
+        elif owner is not None:
+            # A player back on a new session takes over their old game
+            del self.registry.records[owner_id]
+        elif os.path.exists(self._spill_path(game_id)):
+            # Spilled by a session this process no longer tracks
+            self.registry.spilled_games.add(game_id)
+
+        record = _SessionRecord(self._session_state, game_id)
+        self.registry.records[self.session_id] = record
+        return record, owner
+
+    def _inherit(self, owner):
+        """Take over a disconnected session's game; True if it is on disk."""
+        with owner.lock:
+            owner.retired = True
+            if owner.spilled:
+                return True
+            snapshot = self._persisted_state(owner.session_state)
+        self._restore(snapshot)
+        return False
+
+    def begin_run(self):
+        """Mark this session as active, rehydrating its game if it was spilled."""
+        if self.session_id is None:
+            return
+
+        previous_owner = None
+        with self.registry.lock:
+            record = self.registry.records.get(self.session_id)
+            if record is None:
+                record, previous_owner = self._register_session()
+            self.registry.records.move_to_end(self.session_id)
+
+        inherited_spill = previous_owner is not None and self._inherit(previous_owner)
+
+        with record.lock:
+            with self.registry.lock:
+                game_spilled = record.game_id in self.registry.spilled_games
+            needs_rehydrate = record.spilled or game_spilled or inherited_spill
+            record.session_state = self._session_state
+            record.running = True
+            record.spilled = False
+            record.last_seen = time.monotonic()
+
+            if needs_rehydrate:
+                self._rehydrate(record.game_id)
+
+    def end_run(self):
+        """Record this session's footprint, then spill idle and cold sessions."""
+        if self.session_id is None:
+            return
+
+        footprint = self.measure_footprint()
+        now = time.monotonic()
+
+        # Pick victims under the registry lock; write snapshots outside it
+        with self.registry.lock:
+            record = self.registry.records.get(self.session_id)
+            if record is not None:
+                record.footprint = footprint
+                record.last_seen = now
+                record.running = False
+
+            closed = self._prune_closed_sessions()
+            victims = self._select_spill_victims(now, closed)
+            for victim in victims:
+                victim.spilling = True
+
+            sweep_due = now - self.registry.last_sweep >= SWEEP_INTERVAL_SECONDS
+            if sweep_due:
+                self.registry.last_sweep = now
+                live_spills = {r.game_id for r in self.registry.records.values() if r.spilled}
+
+        for victim in victims:
+            self._spill(victim)
+
+        if closed:
+            with self.registry.lock:
+                self._prune_closed_sessions()
+
+        if sweep_due:
+            self._sweep_expired_spills(live_spills)
+
+    def _evictable(self, session_id, record, now):
+        """Check whether a session may be spilled right now."""
+        running = record.running and record.last_seen >= now - RUN_TIMEOUT_SECONDS
+        return (
+            session_id != self.session_id
+            and not running
+            and not record.spilling
+            and not record.spilled
+            and not record.retired
+        )
+
+    def _prune_closed_sessions(self):
+        """Forget disconnected sessions whose game is on disk; return the rest.
+
+        Disconnected sessions still holding their game are returned so they
+        can be spilled first, and a player coming back later can reload it.
+        """
+        closed = set()
+        for session_id, record in list(self.registry.records.items()):
+            if self._is_connected(session_id):
+                continue
+            if record.spilled:
+                del self.registry.records[session_id]
+            else:
+                closed.add(session_id)
+        return closed
+
+    def _select_spill_victims(self, now, closed):
+        """Pick closed and idle sessions, then the least recently used until under budget."""
+        resident = self.registry.resident_bytes()
+        victims = []
+        for session_id, record in self.registry.records.items():
+            if not self._evictable(session_id, record, now):
+                continue
+            idle = record.last_seen < now - self.idle_timeout
+            if session_id in closed or idle or resident > self.state_budget:
+                victims.append(record)
+                resident -= record.footprint
+        return victims
+
+    def _sweep_expired_spills(self, live_spills):
+        """Delete stored snapshots older than the TTL, except live spilled games."""
+        cutoff = time.time() - self.spill_ttl
+        try:
+            entries = list(os.scandir(self.spill_dir))
+        except OSError:
+            return
+
+        for entry in entries:
+            # Only touch files this module wrote: <game_id>.json[.tmp]
+            game_id, _, suffix = entry.name.partition(".")
+            if not GAME_ID_PATTERN.fullmatch(game_id) or suffix not in ("json", "json.tmp"):
+                continue
+            if game_id in live_spills:
+                continue
+            try:
+                if entry.stat().st_mtime >= cutoff:
+                    continue
+                os.remove(entry.path)
+            except OSError:
+                continue
+            with self.registry.lock:
+                self.registry.spilled_games.discard(game_id)